@@ -1,5 +1,6 @@
+import os
 from tetris_app import TetrisApp
 
 if __name__ == "__main__":
-    tetris_app = TetrisApp()
+    tetris_app = TetrisApp(replay_dir=os.environ.get("TETRIS_REPLAY_DIR"), event_log=os.environ.get("TETRIS_EVENT_LOG"))
     tetris_app.run()
@@ -0,0 +1,226 @@
+import json
+import struct
+import threading
+from collections import deque, namedtuple
+
+# Gameplay events. Every event starts with a time.monotonic_ns() timestamp and
+# otherwise only carries ints, so it fits both the JSONL and the binary format.
+# Shapes are given as their index in constants.SHAPES, game modes as their
+# index in replay.MODES, and games by the id the app numbers them with.
+PieceSpawn = namedtuple("PieceSpawn", "time shape x y")
+PieceLock = namedtuple("PieceLock", "time shape x y rotation")
+LineClear = namedtuple("LineClear", "time lines")
+Hold = namedtuple("Hold", "time shape")
+Drop = namedtuple("Drop", "time shape distance")
+ScoreChange = namedtuple("ScoreChange", "time delta score")
+GameOver = namedtuple("GameOver", "time score")
+GameStart = namedtuple("GameStart", "time game mode")
+GameAbandon = namedtuple("GameAbandon", "time game score")
+
+EVENT_TYPES = [PieceSpawn, PieceLock, LineClear, Hold, Drop, ScoreChange, GameOver, GameStart, GameAbandon]
+EVENT_IDS = {event_type: index for index, event_type in enumerate(EVENT_TYPES)}
+
+# Binary record header: event type id, number of fields after the timestamp, timestamp
+RECORD_HEADER = struct.Struct("<BBq")
+
+
+class EventBus:
+    """
+    Passes gameplay events from a TetrisBoard to the attached sinks.
+
+    Emitters check `sinks` before building an event, so a bus without sinks
+    costs a single attribute lookup per state change.
+    """
+
+    def __init__(self):
+        self.sinks = []
+
+    def attach(self, sink):
+        self.sinks.append(sink)
+
+    def detach(self, sink):
+        self.sinks.remove(sink)
+
+    def emit(self, event):
+        for sink in self.sinks:
+            sink.write(event)
+
+    def close(self):
+        """Closes every attached sink that needs closing."""
+        for sink in self.sinks:
+            if hasattr(sink, "close"):
+                sink.close()
+
+    def __getstate__(self):
+        # Sinks hold files and threads, so copies of a board (e.g. replay snapshots) start without them
+        return {"sinks": []}
+
+
+class RingBuffer:
+    """
+    Keeps the most recent events in memory.
+
+    Attributes:
+        capacity (int): The number of events kept.
+        dropped (int): The number of events pushed out by newer ones.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.buffer = deque(maxlen=capacity)
+        self.dropped = 0
+
+    def write(self, event):
+        if len(self.buffer) == self.capacity:
+            self.dropped += 1
+        self.buffer.append(event)
+
+    def events(self):
+        """Returns the buffered events, oldest first."""
+        return list(self.buffer)
+
+
+class EventWriter:
+    """
+    Writes events to a JSONL or binary file from a background thread.
+
+    The game loop only appends to a pending queue; the writer thread encodes
+    and writes events in batches. When the queue is full, new events are
+    dropped and counted, or, with block=True, the caller waits until the
+    writer thread has made room. Blocking stalls the caller, so it is meant
+    for offline tools, not the game loop.
+
+    If writing fails, the writer stops, keeps the exception in `error` and
+    discards every event it still has or is given afterwards.
+
+    Attributes:
+        written (int): The number of events written to the file.
+        dropped (int): The number of events dropped because the queue was full.
+        discarded (int): The number of events lost because the writer was closed or failed.
+        error (Exception): The exception that stopped the writer thread, or None.
+    """
+
+    def __init__(self, path, fmt="jsonl", batch_size=256, max_pending=65536, flush_interval=0.1, block=False):
+        """
+        Opens the file and starts the writer thread.
+
+        Args:
+            path: The file to write to. It is overwritten.
+            fmt: "jsonl" for one JSON object per line, "binary" for records read by read_events.
+            batch_size: The maximum number of events written at once.
+            max_pending: The maximum number of events waiting to be written.
+            flush_interval: Seconds the writer thread sleeps when there is nothing to write.
+            block: Wait for room instead of dropping events when the queue is full.
+        """
+        if fmt not in ("jsonl", "binary"):
+            raise ValueError(f"Unknown format: {fmt}")
+        self.encode = encode_jsonl if fmt == "jsonl" else encode_binary
+        self.file = open(path, 'w' if fmt == "jsonl" else 'wb')
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.block = block
+        self.pending = deque()
+        self.written = 0
+        self.dropped = 0
+        self.discarded = 0
+        self.error = None
+        self.closed = False
+        self.wake = threading.Event()
+        self.room = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="EventWriter", daemon=True)
+        self.thread.start()
+
+    def write(self, event):
+        if self.closed:
+            self.discarded += 1
+            return
+        if len(self.pending) >= self.max_pending:
+            if not self.block:
+                self.dropped += 1
+                return
+            self.wake.set()
+            with self.room:
+                self.room.wait_for(lambda: len(self.pending) < self.max_pending or self.closed)
+            if self.closed:
+                self.discarded += 1
+                return
+        self.pending.append(event)
+        if len(self.pending) >= self.batch_size:
+            self.wake.set()
+
+    def run(self):
+        """Writer thread: drains the pending queue in batches until closed."""
+        while True:
+            closed = self.closed  # Read before draining so nothing written before close() is missed
+            batch = []
+            while self.pending and len(batch) < self.batch_size:
+                batch.append(self.pending.popleft())
+            if batch:
+                try:
+                    self.file.write(self.encode(batch))
+                    self.file.flush()
+                except Exception as error:
+                    self.fail(error, len(batch))
+                    return
+                self.written += len(batch)
+                with self.room:
+                    self.room.notify_all()
+            elif closed:
+                break
+            else:
+                self.wake.wait(self.flush_interval)
+                self.wake.clear()
+
+    def fail(self, error, lost):
+        """Stops the writer after `error`, discarding the `lost` events being written and all pending ones."""
+        with self.room:
+            self.error = error
+            self.closed = True
+            self.discarded += lost + len(self.pending)
+            self.pending.clear()
+            self.room.notify_all()
+
+    def close(self):
+        """Writes out the pending events, stops the writer thread and closes the file."""
+        with self.room:
+            self.closed = True
+            self.room.notify_all()
+        self.wake.set()
+        self.thread.join()
+        try:
+            self.file.close()
+        except Exception:
+            if self.error is None:  # A failed file may fail again while flushing on close
+                raise
+
+
+def encode_jsonl(events):
+    return "".join(json.dumps({"type": type(event).__name__, **event._asdict()}) + "\n" for event in events)
+
+
+def encode_binary(events):
+    records = []
+    for event in events:
+        fields = event[1:]
+        records.append(RECORD_HEADER.pack(EVENT_IDS[type(event)], len(fields), event.time))
+        records.append(struct.pack(f"<{len(fields)}i", *fields))
+    return b"".join(records)
+
+
+def read_events(path):
+    """
+    Reads back a binary event file written by EventWriter.
+
+    Yields:
+        The events in the order they were written.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    offset = 0
+    while offset < len(data):
+        type_id, count, timestamp = RECORD_HEADER.unpack_from(data, offset)
+        offset += RECORD_HEADER.size
+        fields = struct.unpack_from(f"<{count}i", data, offset)
+        offset += 4 * count
+        yield EVENT_TYPES[type_id](timestamp, *fields)
@@ -0,0 +1,124 @@
+import json
+import pickle
+import random
+from constants import WIDTH, HEIGHT, GRID_SIZE
+from tetris_board import TetrisBoard, LiteTetrisBoard, RegularTetrisBoard
+
+# Board class and grid width for every game mode offered in the main menu
+MODES = {
+    "deluxe": (TetrisBoard, WIDTH // GRID_SIZE),
+    "lite": (LiteTetrisBoard, int(2*WIDTH/4) // GRID_SIZE),
+    "regular": (RegularTetrisBoard, int(2*WIDTH/3) // GRID_SIZE),
+}
+
+# Player and gravity actions that can change the board between two frames
+ACTIONS = {
+    "left": lambda board: board.move(-1, 0),
+    "right": lambda board: board.move(1, 0),
+    "down": lambda board: board.move(0, 1),
+    "ccw": lambda board: board.rotateCounterClockWise(),
+    "cw": lambda board: board.rotateClockwise(),
+    "hold": lambda board: board.hold(),
+    "drop": lambda board: board.hardDrop(),
+    "tick": lambda board: board.update(),
+}
+
+
+def make_board(mode, events=None):
+    """Creates a fresh board for the given game mode, emitting on `events` if given."""
+    board_class, width = MODES[mode]
+    return board_class(width, HEIGHT // GRID_SIZE, events)
+
+
+def apply_action(board, action):
+    """Applies a named action from ACTIONS to the board."""
+    ACTIONS[action](board)
+
+
+class Replay:
+    """
+    A recorded game: the game mode, the random seed the board was created with,
+    and every action applied to it, tagged with the frame it happened on.
+
+    Because pieces and colors come from the global random generator, seeding it
+    and replaying the same actions reproduces the game exactly.
+
+    Attributes:
+        mode (str): One of the keys of MODES.
+        seed (int): The seed passed to random.seed before the board was created.
+        frames (int): The number of frames the game lasted.
+        inputs (list): [frame, action] pairs in the order they were applied.
+    """
+
+    def __init__(self, mode, seed, frames=0, inputs=None):
+        self.mode = mode
+        self.seed = seed
+        self.frames = frames
+        self.inputs = inputs if inputs is not None else []
+
+    def start(self, events=None):
+        """Seeds the random generator and returns the board the game starts with."""
+        random.seed(self.seed)
+        return make_board(self.mode, events)
+
+    def record(self, action):
+        """Records an action applied during the current frame."""
+        self.inputs.append([self.frames, action])
+
+    def advance(self):
+        """Moves the recording on to the next frame."""
+        self.frames += 1
+
+    def save(self, path):
+        with open(path, 'w') as file:
+            json.dump({"mode": self.mode, "seed": self.seed, "frames": self.frames, "inputs": self.inputs}, file)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as file:
+            data = json.load(file)
+        return cls(data["mode"], data["seed"], data["frames"], data["inputs"])
+
+    def frame_actions(self):
+        """
+        Groups the recorded actions by frame.
+
+        Returns:
+            A list with one list of actions per frame.
+        """
+        actions = [[] for _ in range(self.frames)]
+        for frame, action in self.inputs:
+            actions[frame].append(action)
+        return actions
+
+    def keyframes(self, interval):
+        """
+        Replays the game without drawing it and takes a snapshot every `interval` frames.
+
+        Yields:
+            (start, end, snapshot, actions) for each segment of the game, where
+            snapshot restores the state at the start of frame `start` and actions
+            holds the actions for frames start to end - 1.
+        """
+        board = self.start()
+        actions = self.frame_actions()
+        for start in range(0, self.frames, interval):
+            end = min(start + interval, self.frames)
+            state = random.getstate()
+            yield start, end, snapshot(board), actions[start:end]
+            random.setstate(state)  # The caller may have used the generator in between
+            for frame_actions in actions[start:end]:
+                for action in frame_actions:
+                    apply_action(board, action)
+
+
+def snapshot(board):
+    """Captures the board and the random generator state as bytes."""
+    return pickle.dumps((board, random.getstate()))
+
+
+def restore(data):
+    """Restores a snapshot taken by snapshot() and returns its board."""
+    board, state = pickle.loads(data)
+    random.setstate(state)
+    return board
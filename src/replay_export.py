@@ -0,0 +1,159 @@
+import argparse
+import os
+import shutil
+from collections import Counter, deque
+from multiprocessing import Pool
+from constants import WIDTH, HEIGHT
+from replay import Replay, apply_action, restore
+
+# Rendering happens off-screen, so workers never need a real display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# SDL turns SIGTERM into a quit event, which would keep Pool.terminate() from stopping workers
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+
+import pygame
+
+KEYFRAME_INTERVAL = 600  # Frames per segment, 10 seconds of play at 60 FPS
+FORMATS = ("png", "raw")
+
+_screen = None
+
+
+def init_worker():
+    """Sets up pygame and the off-screen surface every segment in this worker is drawn on."""
+    global _screen
+    pygame.init()
+    _screen = pygame.Surface((WIDTH, HEIGHT))
+
+
+def render_segment(task):
+    """
+    Renders one segment of a game, starting from its keyframe snapshot.
+
+    PNG frames are written straight to their final names. Raw frames are
+    streamed into a part file that the parent appends to the game's video.
+
+    Args:
+        task: (out_dir, name, fmt, start, snapshot, actions) for the segment.
+
+    Returns:
+        (video path, part path) for raw output, or None for PNG output.
+    """
+    out_dir, name, fmt, start, data, actions = task
+    board = restore(data)
+    video_path = os.path.join(out_dir, f"{name}.rgb")
+    part_path = segment_part_path(out_dir, name, start)
+    part = open(part_path, 'wb') if fmt == "raw" else None
+    try:
+        for offset, frame_actions in enumerate(actions):
+            for action in frame_actions:
+                apply_action(board, action)
+            board.draw(_screen)
+            if part is None:
+                pygame.image.save(_screen, os.path.join(out_dir, name, f"frame_{start + offset:08d}.png"))
+            else:
+                part.write(pygame.image.tobytes(_screen, "RGB"))
+    finally:
+        if part is not None:
+            part.close()
+    return (video_path, part_path) if part is not None else None
+
+
+def segment_part_path(out_dir, name, start):
+    """Returns the file a raw segment starting at frame `start` is rendered into."""
+    return os.path.join(out_dir, f"{name}.rgb.{start:08d}.part")
+
+
+def game_name(path):
+    """Returns the name a replay's output is saved under."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def replay_tasks(paths, out_dir, fmt, interval):
+    """
+    Splits every replay into segments at its keyframes.
+
+    Games are replayed lazily, so only the keyframes of segments that have
+    been asked for are kept in memory.
+    """
+    for path in paths:
+        replay = Replay.load(path)
+        name = game_name(path)
+        if fmt == "png":
+            os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+        else:
+            open(os.path.join(out_dir, f"{name}.rgb"), 'wb').close()
+        for start, _, data, actions in replay.keyframes(interval):
+            yield out_dir, name, fmt, start, data, actions
+
+
+def export(paths, out_dir, fmt="png", workers=None, interval=KEYFRAME_INTERVAL, segments_per_worker=2):
+    """
+    Renders recorded games to PNG frame sequences or raw RGB24 video files.
+
+    Segments are rendered in parallel and reassembled in game and frame order.
+    At most two segments per worker are in flight, and each worker is recycled
+    after a few segments to keep its memory bounded. If a segment fails, the
+    pool is stopped, leftover part files are removed and the error is raised.
+
+    Args:
+        paths: Replay files saved by Replay.save.
+        out_dir: Directory for the output. PNG frames go in a subdirectory per
+            game, raw video goes in <game>.rgb (WIDTH x HEIGHT, rgb24).
+        fmt: "png" or "raw".
+        workers: Number of worker processes, defaults to the CPU count.
+        interval: Number of frames between keyframes.
+        segments_per_worker: Segments a worker renders before it is replaced.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    duplicates = sorted(name for name, count in Counter(map(game_name, paths)).items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Replays would overwrite each other's output: {', '.join(duplicates)}")
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    pending = deque()  # (part path, result) for every segment in flight, in order
+    with Pool(workers, initializer=init_worker, maxtasksperchild=segments_per_worker) as pool:
+        try:
+            for task in replay_tasks(paths, out_dir, fmt, interval):
+                pending.append((segment_part_path(out_dir, task[1], task[3]), pool.apply_async(render_segment, (task,))))
+                if len(pending) >= workers * 2:
+                    append_segment(pending.popleft()[1].get())
+            while pending:
+                append_segment(pending.popleft()[1].get())
+            pool.close()
+            pool.join()
+        except BaseException:
+            pool.terminate()
+            pool.join()
+            for part_path, _ in pending:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+            raise
+
+
+def append_segment(result):
+    """Appends a rendered raw segment to its game's video and removes the part file."""
+    if result is None:
+        return
+    video_path, part_path = result
+    with open(video_path, 'ab') as video, open(part_path, 'rb') as part:
+        shutil.copyfileobj(part, video)
+    os.remove(part_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render recorded Tetris games off-screen.")
+    parser.add_argument("replays", nargs="+", help="replay files to render")
+    parser.add_argument("-o", "--out", default="frames", help="output directory")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="png", help="PNG frames or raw RGB24 video")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("-k", "--keyframe-interval", type=int, default=KEYFRAME_INTERVAL,
+                        help="frames between keyframes, i.e. the size of a segment")
+    args = parser.parse_args()
+    export(args.replays, args.out, args.format, args.workers, args.keyframe_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,21 @@
+import os
+import time
 import pygame
-from constants import WIDTH, HEIGHT, GRID_SIZE, BLACK, SCORE_FILE, SCREEN_WIDTH, SCREEN_HEIGHT
-from tetris_board import TetrisBoard, LiteTetrisBoard, RegularTetrisBoard
+from constants import WIDTH, HEIGHT, BLACK, SCORE_FILE, SCREEN_WIDTH, SCREEN_HEIGHT
 from button import Button
+from replay import MODES, Replay, apply_action, make_board
+from events import EventBus, EventWriter, GameStart, GameAbandon
+
+# Game controls, mapped to the replay action each key performs
+KEY_ACTIONS = {
+    pygame.K_LEFT: "left",
+    pygame.K_RIGHT: "right",
+    pygame.K_DOWN: "down",
+    pygame.K_z: "ccw",
+    pygame.K_x: "cw",
+    pygame.K_c: "hold",
+    pygame.K_SPACE: "drop",
+}
 
 class TetrisApp:
     """
@@ -10,14 +24,26 @@ class TetrisApp:
     game over, and playing states.
     """
 
-    def __init__(self):
-        """Initialize the Tetris game application."""
+    def __init__(self, replay_dir=None, event_log=None):
+        """
+        Initialize the Tetris game application.
+
+        Args:
+            replay_dir: Directory to save a replay of every finished game to, or None.
+            event_log: JSONL file to write gameplay events to, or None.
+        """
         pygame.init()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption("Tetris Game")
         self.clock = pygame.time.Clock()
         self.running = True
-        self.game = TetrisBoard(WIDTH // GRID_SIZE, HEIGHT // GRID_SIZE)
+        self.replay_dir = replay_dir
+        self.events = EventBus()
+        if event_log is not None:
+            self.events.attach(EventWriter(event_log))
+        self.game_id = 0
+        self.replay = None  # Set when a game is started from the menu
+        self.game = make_board("deluxe")
         self.fall_time = 0
         self.fall_speed = 55  # milliseconds
         self.highest_score = self.load_score()
@@ -49,14 +75,19 @@ class TetrisApp:
     
     def run(self):
         """Run the main game loop."""
-        while self.running:
-            if self.show_menu:
-                self.main_menu()
-            else:
-                self.clock.tick(60)
-                self.handle_events()
-                self.update_game_state()
-                self.draw()
+        try:
+            while self.running:
+                if self.show_menu:
+                    self.main_menu()
+                else:
+                    self.clock.tick(60)
+                    self.handle_events()
+                    self.update_game_state()
+                    self.replay.advance()
+                    self.draw()
+        finally:
+            self.end_game()
+            self.events.close()
 
     def handle_events(self):
         """Handle user input and system events."""
@@ -81,20 +112,14 @@ class TetrisApp:
     
     def handle_keydown(self, event):
         """Handle keyboard events for game controls."""
-        if event.key == pygame.K_LEFT:
-            self.game.move(-1, 0)
-        elif event.key == pygame.K_RIGHT:
-            self.game.move(1, 0)
-        elif event.key == pygame.K_DOWN:
-            self.game.move(0, 1)
-        elif event.key == pygame.K_z:
-            self.game.rotateCounterClockWise()
-        elif event.key == pygame.K_x:
-            self.game.rotateClockwise()
-        elif event.key == pygame.K_c:
-            self.game.hold()
-        elif event.key == pygame.K_SPACE:
-            self.game.hardDrop()
+        action = KEY_ACTIONS.get(event.key)
+        if action is not None:
+            self.apply(action)
+
+    def apply(self, action):
+        """Apply an action to the game and record it in the replay."""
+        apply_action(self.game, action)
+        self.replay.record(action)
 
     def update_game_state(self):
         """Update the game state, including falling pieces and game over checks."""
@@ -102,7 +127,7 @@ class TetrisApp:
             self.fall_time += self.clock.get_rawtime()
             if self.fall_time > self.fall_speed:
                 self.fall_time = 0
-                self.game.update()
+                self.apply("tick")
 
     def draw(self):
         """Draw the current game state to the screen."""
@@ -115,10 +140,32 @@ class TetrisApp:
         if self.game.game_over:
             self.draw_game_over()
             pygame.display.update()
+            self.save_replay()
             pygame.time.wait(2000)  # Wait for 2 seconds before showing the main menu
             self.show_menu = True
         pygame.display.update()
 
+    def save_replay(self):
+        """Save the replay of the finished game, if replays are enabled."""
+        if self.replay_dir is None:
+            return
+        os.makedirs(self.replay_dir, exist_ok=True)
+        self.replay.save(os.path.join(self.replay_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.replay.seed}.json"))
+
+    def new_game(self, mode):
+        """Start recording a new game in the given mode and return its board."""
+        self.end_game()
+        self.game_id += 1
+        if self.events.sinks:
+            self.events.emit(GameStart(time.monotonic_ns(), self.game_id, list(MODES).index(mode)))
+        self.replay = Replay(mode, int.from_bytes(os.urandom(4), "little"))
+        return self.replay.start(self.events)
+
+    def end_game(self):
+        """Emit GameAbandon if the current game is being left before it is over."""
+        if self.replay is not None and not self.game.game_over and self.events.sinks:
+            self.events.emit(GameAbandon(time.monotonic_ns(), self.game_id, self.game.score))
+
     def draw_score(self):
         """Draw the current score on the screen."""
         font = pygame.font.Font(None, 36)
@@ -167,7 +214,7 @@ class TetrisApp:
         """
         Reset the game to its initial state. This is used for starting a new game from the main menu or restarting the game.
         """
-        self.game = TetrisBoard(WIDTH // GRID_SIZE, HEIGHT // GRID_SIZE)
+        self.game = self.new_game("deluxe")
         self.fall_time = 0
         self.show_menu = False
         # self.fall_speed = 75
@@ -177,7 +224,7 @@ class TetrisApp:
         This is used for starting a new lite game from the main menu.
         """
         # self.game = TetrisBoard(int(2*WIDTH/4) // GRID_SIZE, HEIGHT // GRID_SIZE)
-        self.game = LiteTetrisBoard(int(2*WIDTH/4) // GRID_SIZE, HEIGHT // GRID_SIZE)
+        self.game = self.new_game("lite")
         self.fall_time = 0
         self.show_menu = False
         self.fall_speed = 100
@@ -186,7 +233,7 @@ class TetrisApp:
         """
         This is used for starting a new regular game from the main menu.
         """
-        self.game = RegularTetrisBoard(int(2*WIDTH/3) // GRID_SIZE, HEIGHT // GRID_SIZE)
+        self.game = self.new_game("regular")
         self.fall_time = 0
         self.show_menu = False
         self.fall_speed = 100
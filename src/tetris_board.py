@@ -1,7 +1,9 @@
 import random
+import time
 import pygame
 from Queue import Queue
 from tetromino import Tetromino
+from events import EventBus, PieceSpawn, PieceLock, LineClear, Hold, Drop, ScoreChange, GameOver
 from constants import SHAPES, WIDTH, GRID_SIZE, BLACK, RED, GAME_OVER_HEIGHT, HEIGHT, DARK_GRAY
 
 class TetrisBoard:
@@ -10,14 +12,16 @@ class TetrisBoard:
     score, and game-over condition.
     """
 
-    def __init__(self, width, height):
+    def __init__(self, width, height, events=None):
         """
         Initializes the Tetris board with a specified width and height.
 
         Args:
             width: The width of the Tetris grid (number of columns).
             height: The height of the Tetris grid (number of rows).
+            events: The EventBus gameplay events are emitted on. A new one is created if None.
         """
+        self.events = events if events is not None else EventBus()
         self.width = width
         self.height = height
         self.grid = [[0 for _ in range(width)] for _ in range(height)] # Initialize an empty grid
@@ -27,6 +31,12 @@ class TetrisBoard:
         for _ in range(5): self.queue.add(self.new_piece())
         self.current_piece = self.queue.next()
         self.swapped = False
+        if self.events.sinks: self.emit_spawn()
+
+    def emit_spawn(self):
+        """Emits a PieceSpawn event for the current piece."""
+        piece = self.current_piece
+        self.events.emit(PieceSpawn(time.monotonic_ns(), SHAPES.index(piece.shape), piece.x, piece.y))
 
     def new_piece(self):
         """
@@ -116,6 +126,8 @@ class TetrisBoard:
         for _ in range(lines_cleared):
             new_grid.insert(0, [0 for _ in range(self.width)])
         self.grid = new_grid
+        if lines_cleared and self.events.sinks:
+            self.events.emit(LineClear(time.monotonic_ns(), lines_cleared))
         return lines_cleared
 
     def check_game_over(self):
@@ -124,18 +136,23 @@ class TetrisBoard:
             for x in range(self.width):
                 if self.grid[y][x] != 0:  # There's a block above the game over height
                     self.game_over = True
+                    if self.events.sinks:
+                        self.events.emit(GameOver(time.monotonic_ns(), self.score))
                     return True
         return False
     
     def hold(self):
         if self.swapped:
             return
+        if self.events.sinks:
+            self.events.emit(Hold(time.monotonic_ns(), SHAPES.index(self.current_piece.shape)))
         self.current_piece.x = self.width//2
         self.current_piece.y = 0
         self.current_piece = self.queue.swap(self.current_piece)
         if self.current_piece == None:
             self.current_piece = self.new_piece()
         self.swapped = True
+        if self.events.sinks: self.emit_spawn()
 
     def lock_piece(self, piece):
         """
@@ -146,10 +163,15 @@ class TetrisBoard:
             for j, cell in enumerate(row):
                 if cell == 'O':
                     self.grid[piece.y + i][piece.x + j] = piece.color
+        if self.events.sinks:
+            self.events.emit(PieceLock(time.monotonic_ns(), SHAPES.index(piece.shape), piece.x, piece.y, piece.rotation))
         lines_cleared = self.clear_lines()
         self.score += lines_cleared * 100
+        if lines_cleared and self.events.sinks:
+            self.events.emit(ScoreChange(time.monotonic_ns(), lines_cleared * 100, self.score))
         self.current_piece = self.queue.next()
         self.queue.add(self.new_piece())
+        if self.events.sinks: self.emit_spawn()
         self.check_game_over() # Check if the game is over after locking the piece
         self.swapped = False
 
@@ -163,8 +185,11 @@ class TetrisBoard:
         else:
             self.lock_piece(self.current_piece)
     def hardDrop(self):
+        start_y = self.current_piece.y
         while (self.valid_move(self.current_piece, 0, 1, 0)):
             self.current_piece.y += 1
+        if self.events.sinks:
+            self.events.emit(Drop(time.monotonic_ns(), SHAPES.index(self.current_piece.shape), self.current_piece.y - start_y))
         self.lock_piece(self.current_piece)
 
         
@@ -245,8 +270,8 @@ class LiteTetrisBoard(TetrisBoard):
     This class manages another gamemode of Tetris named Tetris Lite
     It copies the functionality of the class TetrisBoard but with a smaller board size
     """
-    def __init__(self, width, height):
-        super().__init__(width, height)
+    def __init__(self, width, height, events=None):
+        super().__init__(width, height, events)
         
 
     def draw_rectangle(self, screen, x = None, y = GAME_OVER_HEIGHT * GRID_SIZE, width = None, height = None, color = DARK_GRAY):
@@ -281,7 +306,7 @@ class LiteTetrisBoard(TetrisBoard):
                     pygame.draw.rect(screen, self.current_piece.color, ((self.current_piece.x + j) * GRID_SIZE, (self.current_piece.y + i) * GRID_SIZE, GRID_SIZE - 1, GRID_SIZE - 1))
 
         # Draw outline
-        outline : Tetromino = Tetromino(self.current_piece.x, self.current_piece.y, self.current_piece.shape)
+        outline : Tetromino = Tetromino(self.current_piece.x, self.current_piece.y, self.current_piece.shape, self.current_piece.color)
         outline.rotation = self.current_piece.rotation
         while (self.valid_move(outline, 0, 1, 0)):
             outline.y += 1
@@ -300,8 +325,8 @@ class RegularTetrisBoard(TetrisBoard):
     This class manages another gamemode of Tetris named Tetris Lite
     It copies the functionality of the class TetrisBoard but with a smaller board size
     """
-    def __init__(self, width, height):
-        super().__init__(width, height)
+    def __init__(self, width, height, events=None):
+        super().__init__(width, height, events)
         
 
     def draw_rectangle(self, screen, x = None, y = GAME_OVER_HEIGHT * GRID_SIZE, width = None, height = None, color = DARK_GRAY):
@@ -337,7 +362,7 @@ class RegularTetrisBoard(TetrisBoard):
                     pygame.draw.rect(screen, self.current_piece.color, ((self.current_piece.x + j) * GRID_SIZE, (self.current_piece.y + i) * GRID_SIZE, GRID_SIZE - 1, GRID_SIZE - 1))
         
         # Draw outline
-        outline : Tetromino = Tetromino(self.current_piece.x, self.current_piece.y, self.current_piece.shape)
+        outline : Tetromino = Tetromino(self.current_piece.x, self.current_piece.y, self.current_piece.shape, self.current_piece.color)
         outline.rotation = self.current_piece.rotation
         while (self.valid_move(outline, 0, 1, 0)):
             outline.y += 1
@@ -10,13 +10,16 @@ class Tetromino:
         x (int): The x-coordinate of the Tetromino's position on the Tetris grid.
         y (int): The y-coordinate of the Tetromino's position on the Tetris grid.
         shape (list): A list of strings representing the shape of the Tetromino.
-        color (tuple): The RGB color of the Tetromino, randomly chosen from predefined colors.
+        color (tuple): The RGB color of the Tetromino, randomly chosen from predefined colors
+            unless one is given.
         rotation (int): The current rotation state of the Tetromino, starting at 0.
     """
 
-    def __init__(self, x, y, shape):
+    def __init__(self, x, y, shape, color=None):
         self.x = x
         self.y = y
         self.shape = shape
-        self.color = random.choice(COLORS)  # Selects a random color from the COLORS constant.
+        # Selects a random color from the COLORS constant. Passing a color leaves the random generator
+        # untouched, so pieces that are only drawn (like the outline) don't change which pieces come next.
+        self.color = color if color is not None else random.choice(COLORS)
         self.rotation = 0  # Initializes the rotation state of the Tetromino to 0.
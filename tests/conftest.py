@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The game modules import each other by their bare names, as when running src/app.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
@@ -0,0 +1,133 @@
+import random
+import threading
+from constants import SHAPES
+from events import (EventBus, EventWriter, RingBuffer, read_events, encode_binary,
+                    PieceSpawn, PieceLock, LineClear, Hold, Drop, ScoreChange, GameOver, GameStart)
+from replay import ACTIONS, apply_action
+from tetris_board import TetrisBoard
+from tetromino import Tetromino
+
+
+class CountingBus(EventBus):
+    def __init__(self):
+        super().__init__()
+        self.emitted = 0
+
+    def emit(self, event):
+        self.emitted += 1
+        super().emit(event)
+
+
+class FailingFile:
+    closed = False
+
+    def write(self, data):
+        raise OSError("disk full")
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def line_clear_board(events):
+    """Returns a 10x20 board whose bottom row only misses the I piece about to be dropped into it."""
+    board = TetrisBoard(10, 20, events)
+    board.grid[19] = [(255, 255, 255)] * 4 + [0] * 4 + [(255, 255, 255)] * 2
+    board.current_piece = Tetromino(4, 10, SHAPES[0])  # Rotation 0 fills row 3 of the shape
+    return board
+
+
+def test_hard_drop_event_order():
+    bus = EventBus()
+    ring = RingBuffer()
+    bus.attach(ring)
+    board = line_clear_board(bus)
+    ring.buffer.clear()
+    board.hardDrop()
+    events = ring.events()
+    assert [type(event) for event in events] == [Drop, PieceLock, LineClear, ScoreChange, PieceSpawn]
+    drop, lock, clear, score, _ = events
+    assert (drop.shape, drop.distance) == (0, 6)
+    assert (lock.x, lock.y) == (4, 16)
+    assert clear.lines == 1
+    assert (score.delta, score.score) == (100, 100)
+    assert [event.time for event in events] == sorted(event.time for event in events)
+
+
+def test_hold_and_game_over_events():
+    bus = EventBus()
+    ring = RingBuffer()
+    bus.attach(ring)
+    board = TetrisBoard(10, 20, bus)
+    board.hold()
+    assert [type(event) for event in ring.events()[-2:]] == [Hold, PieceSpawn]
+    board.grid[0][0] = (255, 255, 255)
+    board.check_game_over()
+    assert type(ring.events()[-1]) is GameOver
+
+
+def test_no_emits_without_sinks():
+    bus = CountingBus()
+    board = TetrisBoard(10, 20, bus)
+    rng = random.Random(3)
+    for _ in range(500):
+        apply_action(board, rng.choice(list(ACTIONS)))
+    assert bus.emitted == 0
+
+
+def test_ring_buffer_counts_dropped_events():
+    ring = RingBuffer(capacity=3)
+    for score in range(5):
+        ring.write(GameOver(score, score))
+    assert ring.dropped == 2
+    assert [event.score for event in ring.events()] == [2, 3, 4]
+
+
+def test_binary_round_trip(tmp_path):
+    events = [PieceSpawn(1, 2, 3, 4), PieceLock(5, 1, -2, 18, 3), ScoreChange(6, 100, 2300), GameStart(7, 1, 2)]
+    (tmp_path / "events.bin").write_bytes(encode_binary(events))
+    assert list(read_events(tmp_path / "events.bin")) == events
+
+
+def test_writer_round_trip(tmp_path):
+    writer = EventWriter(tmp_path / "events.bin", "binary", batch_size=4)
+    events = [LineClear(index, 1) for index in range(10)]
+    for event in events:
+        writer.write(event)
+    writer.close()
+    assert (writer.written, writer.dropped, writer.discarded) == (10, 0, 0)
+    assert list(read_events(tmp_path / "events.bin")) == events
+
+
+def test_writer_drops_when_full(tmp_path):
+    writer = EventWriter(tmp_path / "events.jsonl", batch_size=100, max_pending=10, flush_interval=60)
+    for index in range(25):
+        writer.write(LineClear(index, 1))
+    writer.close()
+    # The writer thread only wakes up on close, unless it got to some events before it went to sleep
+    assert writer.dropped > 0
+    assert writer.written + writer.dropped == 25
+    assert len((tmp_path / "events.jsonl").read_text().splitlines()) == writer.written
+
+
+def test_writer_failure_does_not_block(tmp_path):
+    writer = EventWriter(tmp_path / "events.jsonl", batch_size=1, max_pending=2, block=True)
+    writer.file.close()
+    writer.file = FailingFile()
+    thread = threading.Thread(target=lambda: [writer.write(LineClear(index, 1)) for index in range(50)])
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+    writer.close()
+    assert isinstance(writer.error, OSError)
+    assert writer.written == 0
+    assert writer.discarded == 50
+
+
+def test_write_after_close_is_counted(tmp_path):
+    writer = EventWriter(tmp_path / "events.jsonl")
+    writer.close()
+    writer.write(LineClear(0, 1))
+    assert writer.discarded == 1
@@ -0,0 +1,102 @@
+import random
+import pytest
+from replay import ACTIONS, MODES, Replay, apply_action, restore
+import replay_export
+
+
+def record_game(mode, frames=400, seed=7):
+    """Plays a game with random actions, drawing every frame like the app does, and returns its replay."""
+    screen = replay_export.pygame.Surface((replay_export.WIDTH, replay_export.HEIGHT))
+    replay = Replay(mode, seed)
+    board = replay.start()
+    rng = random.Random(seed)
+    actions = list(ACTIONS) + ["tick"] * 4
+    for _ in range(frames):
+        for _ in range(rng.randrange(3)):
+            action = rng.choice(actions)
+            apply_action(board, action)
+            replay.record(action)
+        replay.advance()
+        board.draw(screen)
+    return replay
+
+
+@pytest.fixture(autouse=True)
+def pygame_init():
+    replay_export.pygame.init()
+    yield
+    replay_export.pygame.quit()
+
+
+def export_raw(tmp_path, replay, name, interval):
+    path = tmp_path / f"{name}.json"
+    replay.save(path)
+    out = tmp_path / f"out-{interval}"
+    replay_export.export([str(path)], str(out), "raw", workers=2, interval=interval)
+    return (out / f"{name}.rgb").read_bytes()
+
+
+@pytest.mark.parametrize("mode", list(MODES))
+def test_segmented_export_matches_single_segment(tmp_path, mode):
+    replay = record_game(mode)
+    assert export_raw(tmp_path, replay, mode, 50) == export_raw(tmp_path, replay, mode, 10000)
+
+
+def test_save_load_round_trip(tmp_path):
+    replay = record_game("deluxe", frames=100)
+    replay.save(tmp_path / "game.json")
+    loaded = Replay.load(tmp_path / "game.json")
+    assert (loaded.mode, loaded.seed, loaded.frames, loaded.inputs) == (replay.mode, replay.seed, replay.frames, replay.inputs)
+
+
+@pytest.mark.parametrize("mode", list(MODES))
+def test_keyframes_reproduce_straight_replay(mode):
+    replay = record_game(mode)
+    board = replay.start()
+    for frame_actions in replay.frame_actions():
+        for action in frame_actions:
+            apply_action(board, action)
+    for _, _, data, actions in replay.keyframes(50):
+        segment_board = restore(data)
+        for frame_actions in actions:
+            for action in frame_actions:
+                apply_action(segment_board, action)
+    assert (segment_board.grid, segment_board.score, segment_board.game_over) == (board.grid, board.score, board.game_over)
+
+
+def test_raw_export_frames_in_order(tmp_path):
+    replay = record_game("lite", frames=120)
+    video = export_raw(tmp_path, replay, "game", 25)
+    frame_size = replay_export.WIDTH * replay_export.HEIGHT * 3
+    assert len(video) == replay.frames * frame_size
+
+    screen = replay_export.pygame.Surface((replay_export.WIDTH, replay_export.HEIGHT))
+    board = replay.start()
+    for frame, frame_actions in enumerate(replay.frame_actions()):
+        for action in frame_actions:
+            apply_action(board, action)
+        board.draw(screen)
+        assert video[frame * frame_size:(frame + 1) * frame_size] == replay_export.pygame.image.tobytes(screen, "RGB")
+
+
+render_segment = replay_export.render_segment
+
+
+def render_first_segment_only(task):
+    if task[3] > 0:
+        raise RuntimeError("segment failed")
+    return render_segment(task)
+
+
+def test_failed_segment_raises_and_cleans_up(tmp_path, monkeypatch):
+    replay = record_game("deluxe", frames=100)
+    replay.save(tmp_path / "game.json")
+    monkeypatch.setattr(replay_export, "render_segment", render_first_segment_only)
+    with pytest.raises(RuntimeError, match="segment failed"):
+        replay_export.export([str(tmp_path / "game.json")], str(tmp_path / "out"), "raw", workers=1, interval=10)
+    assert not list((tmp_path / "out").glob("*.part"))
+
+
+def test_duplicate_names_are_refused(tmp_path):
+    with pytest.raises(ValueError, match="game"):
+        replay_export.export(["a/game.json", "b/game.json"], str(tmp_path / "out"))